@@ -5,78 +5,164 @@ which is a specialized version for xgboost tasks.
 
 # pylint: disable=invalid-name, missing-docstring, too-many-arguments, too-many-locals
 # pylint: disable=too-many-branches, too-many-statements, too-many-instance-attributes
+import asyncio
+import functools
 import socket
 import struct
 import time
 import logging
-from threading import Thread
+from threading import Event, Thread
 import argparse
 import sys
 
-from typing import Dict, List, Tuple, Union, Optional
+from typing import Dict, List, Set, Tuple, Union, Optional
 
-_RingMap = Dict[int, Tuple[int, int]]
-_TreeMap = Dict[int, List[int]]
+# link maps are indexed by rank
+_RingMap = List[Tuple[int, int]]
+_TreeMap = List[List[int]]
+_ParentMap = List[int]
+
+_logger = logging.getLogger(__name__)
+
+# native int used by the wire protocol
+_INT = struct.Struct('@i')
+# fixed part of the worker preamble following the magic number: rank, world size and
+# length of the job id
+_PREAMBLE = struct.Struct('@3i')
+
+
+def _pack_str(s: str) -> bytes:
+    data = s.encode()
+    return _INT.pack(len(data)) + data
 
 
 class ExSocket:
     """
-    Extension of socket to handle recv and send of special data
+    Extension of socket to handle recv and send of special data.  The socket is put
+    in non-blocking mode and served by the event loop of the tracker.
+
+    Reads are buffered: whatever the worker has sent is received at once, so that a
+    sequence of small messages costs a single receive.
     """
 
-    def __init__(self, sock: socket.socket) -> None:
+    # size of a single receive from the socket
+    chunk_size = 4096
+
+    def __init__(self, sock: socket.socket, loop: asyncio.AbstractEventLoop) -> None:
+        sock.setblocking(False)
         self.sock = sock
+        self.loop = loop
+        # received but not yet consumed
+        self._rbuf = bytearray()
+
+    async def _fill(self, nbytes: int) -> None:
+        """Receive until at least nbytes are buffered."""
+        while len(self._rbuf) < nbytes:
+            chunk = await self.loop.sock_recv(self.sock, self.chunk_size)
+            if not chunk:
+                raise ConnectionError(
+                    f"connection closed after {len(self._rbuf)} of {nbytes} bytes"
+                )
+            self._rbuf += chunk
+
+    async def recvall(self, nbytes: int) -> bytes:
+        await self._fill(nbytes)
+        data = bytes(self._rbuf[:nbytes])
+        del self._rbuf[:nbytes]
+        return data
+
+    async def recvint(self) -> int:
+        await self._fill(_INT.size)
+        value = _INT.unpack_from(self._rbuf)[0]
+        del self._rbuf[:_INT.size]
+        return value
+
+    async def sendall(self, data: Union[bytes, bytearray]) -> None:
+        await self.loop.sock_sendall(self.sock, data)
+
+    async def sendint(self, n: int) -> None:
+        await self.sendall(_INT.pack(n))
+
+    async def sendstr(self, s: str) -> None:
+        await self.sendall(_pack_str(s))
+
+    async def recvstr(self) -> str:
+        slen = await self.recvint()
+        return (await self.recvall(slen)).decode()
 
-    def recvall(self, nbytes: int) -> bytes:
-        res = []
-        nread = 0
-        while nread < nbytes:
-            chunk = self.sock.recv(min(nbytes - nread, 1024))
-            nread += len(chunk)
-            res.append(chunk)
-        return b''.join(res)
 
-    def recvint(self) -> int:
-        return struct.unpack('@i', self.recvall(4))[0]
+# magic number used to verify existence of data
+kMagic = 0xff99
 
-    def sendint(self, n: int) -> None:
-        self.sock.sendall(struct.pack('@i', n))
 
-    def sendstr(self, s: str) -> None:
-        self.sendint(len(s))
-        self.sock.sendall(s.encode())
+# resolved addresses, keyed by the host name or address being looked up
+_IP_CACHE: Dict[str, str] = {}
+_FAMILY_CACHE: Dict[str, int] = {}
 
-    def recvstr(self) -> str:
-        slen = self.recvint()
-        return self.recvall(slen).decode()
 
+# address families tried, in the order used to sort hosts
+_FAMILIES = (socket.AF_INET, socket.AF_INET6)
 
-# magic number used to verify existence of data
-kMagic = 0xff99
+
+def _parse_literal(host: str) -> Optional[Tuple[int, bytes]]:
+    """Return the family and packed address if host is an IP literal, None otherwise."""
+    for family in _FAMILIES:
+        try:
+            return family, socket.inet_pton(family, host)
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def _host_sort_key(host: str) -> Tuple[int, int, str]:
+    """Order IP addresses by their numeric value, IPv4 first and host names last."""
+    literal = _parse_literal(host)
+    if literal is None:
+        return len(_FAMILIES), 0, host
+    family, packed = literal
+    return _FAMILIES.index(family), int.from_bytes(packed, 'big'), host
 
 
 def get_some_ip(host: str) -> str:
-    return socket.getaddrinfo(host, None)[0][4][0]
+    if _parse_literal(host) is not None:
+        return host
+    if host not in _IP_CACHE:
+        _IP_CACHE[host] = socket.getaddrinfo(host, None)[0][4][0]
+    return _IP_CACHE[host]
 
 
 def get_family(addr: str) -> int:
-    return socket.getaddrinfo(addr, None)[0][0]
+    literal = _parse_literal(addr)
+    if literal is not None:
+        return literal[0]
+    if addr not in _FAMILY_CACHE:
+        _FAMILY_CACHE[addr] = socket.getaddrinfo(addr, None)[0][0]
+    return _FAMILY_CACHE[addr]
 
 
 class WorkerEntry:
-    def __init__(self, sock: socket.socket, s_addr: Tuple[str, int]):
-        worker = ExSocket(sock)
-        self.sock = worker
+    def __init__(self, sock: ExSocket, s_addr: Tuple[str, int]):
+        self.sock = sock
         self.host = get_some_ip(s_addr[0])
-        magic = worker.recvint()
-        assert magic == kMagic, f"invalid magic number={magic} from {self.host}"
-        worker.sendint(kMagic)
-        self.rank = worker.recvint()
-        self.world_size = worker.recvint()
-        self.jobid = worker.recvstr()
-        self.cmd = worker.recvstr()
+        self.rank = -1
+        self.world_size = -1
+        self.jobid = 'NULL'
+        self.cmd = ''
         self.wait_accept = 0
         self.port: Optional[int] = None
+        # host, port and rank as sent to the peers connecting to this worker
+        self.conn_info: Optional[bytes] = None
+
+    async def handshake(self) -> None:
+        """Receive the preamble the worker sends after connecting."""
+        magic = await self.sock.recvint()
+        assert magic == kMagic, f"invalid magic number={magic} from {self.host}"
+        await self.sock.sendint(kMagic)
+        self.rank, self.world_size, jlen = _PREAMBLE.unpack(
+            await self.sock.recvall(_PREAMBLE.size)
+        )
+        self.jobid = (await self.sock.recvall(jlen)).decode()
+        self.cmd = await self.sock.recvstr()
 
     def decide_rank(self, job_map: Dict[str, int]) -> int:
         if self.rank >= 0:
@@ -85,61 +171,75 @@ class WorkerEntry:
             return job_map[self.jobid]
         return -1
 
-    def assign_rank(
+    async def assign_rank(
         self,
         rank: int,
         wait_conn: Dict[int, "WorkerEntry"],
         tree_map: _TreeMap,
-        parent_map: Dict[int, int],
+        parent_map: _ParentMap,
         ring_map: _RingMap,
     ) -> List[int]:
+        """
+        Send the rank and links to the worker and tell it which peers to connect to.
+
+        The exchange follows ``AllreduceBase::ReConnectLinks`` in rabit and can't be
+        folded into a single message: the peers to connect depend on the links the
+        worker reports as still good, and the worker may report failed connections,
+        in which case another round is done.  Each round is one reply from the
+        tracker, sent as a single buffer.
+
+        Returns the ranks that no longer wait for incoming connections.
+        """
         self.rank = rank
         nnset = set(tree_map[rank])
         rprev, rnext = ring_map[rank]
-        self.sock.sendint(rank)
+        # replies are buffered and sent in one go before each read from the worker
+        buf = bytearray()
+        buf += _INT.pack(rank)
         # send parent rank
-        self.sock.sendint(parent_map[rank])
+        buf += _INT.pack(parent_map[rank])
         # send world size
-        self.sock.sendint(len(tree_map))
-        self.sock.sendint(len(nnset))
+        buf += _INT.pack(len(tree_map))
+        buf += _INT.pack(len(nnset))
         # send the rprev and next link
         for r in nnset:
-            self.sock.sendint(r)
+            buf += _INT.pack(r)
         # send prev link
         if rprev not in (-1, rank):
             nnset.add(rprev)
-            self.sock.sendint(rprev)
+            buf += _INT.pack(rprev)
         else:
-            self.sock.sendint(-1)
+            buf += _INT.pack(-1)
         # send next link
         if rnext not in (-1, rank):
             nnset.add(rnext)
-            self.sock.sendint(rnext)
+            buf += _INT.pack(rnext)
         else:
-            self.sock.sendint(-1)
+            buf += _INT.pack(-1)
+        await self.sock.sendall(buf)
+        goodset: Set[int] = set()
         while True:
-            ngood = self.sock.recvint()
-            goodset = set([])
+            ngood = await self.sock.recvint()
+            goodset.clear()
             for _ in range(ngood):
-                goodset.add(self.sock.recvint())
+                goodset.add(await self.sock.recvint())
             assert goodset.issubset(nnset)
-            badset = nnset - goodset
+            badset = nnset.difference(goodset)
             conset = []
             for r in badset:
                 if r in wait_conn:
                     conset.append(r)
-            self.sock.sendint(len(conset))
-            self.sock.sendint(len(badset) - len(conset))
+            segments = [_INT.pack(len(conset)), _INT.pack(len(badset) - len(conset))]
             for r in conset:
-                self.sock.sendstr(wait_conn[r].host)
-                port = wait_conn[r].port
-                assert port is not None
-                self.sock.sendint(port)
-                self.sock.sendint(r)
-            nerr = self.sock.recvint()
+                info = wait_conn[r].conn_info
+                assert info is not None
+                segments.append(info)
+            await self.sock.sendall(b''.join(segments))
+            nerr = await self.sock.recvint()
             if nerr != 0:
                 continue
-            self.port = self.sock.recvint()
+            self.port = await self.sock.recvint()
+            self.conn_info = _pack_str(self.host) + _INT.pack(self.port) + _INT.pack(rank)
             rmset = []
             # all connection was successuly setup
             for r in conset:
@@ -174,6 +274,10 @@ class RabitTracker:
 
         """
         sock = socket.socket(get_family(hostIP), socket.SOCK_STREAM)
+        if sys.platform != "win32":
+            # Allow rebinding a port left in TIME_WAIT by a previous tracker.  Not set
+            # on Windows, where it allows binding a port that is actively in use.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         for _port in range(port, port_end):
             try:
                 sock.bind((hostIP, _port))
@@ -183,30 +287,21 @@ class RabitTracker:
                 if e.errno in [98, 48]:
                     continue
                 raise
-        sock.listen(256)
+        # all workers connect at about the same time on start up
+        sock.listen(max(256, n_workers))
         self.sock = sock
         self.hostIP = hostIP
         self.thread: Optional[Thread] = None
+        # set once accept_workers returns, either normally or with an error
+        self._done = Event()
         self.n_workers = n_workers
         self._use_logger = use_logger
-        logging.info('start listen on %s:%d', hostIP, self.port)
+        _logger.info('start listen on %s:%d', hostIP, self.port)
 
     def __del__(self) -> None:
         if hasattr(self, "sock"):
             self.sock.close()
 
-    @staticmethod
-    def get_neighbor(rank: int, n_workers: int) -> List[int]:
-        rank = rank + 1
-        ret = []
-        if rank > 1:
-            ret.append(rank // 2 - 1)
-        if rank * 2 - 1 < n_workers:
-            ret.append(rank * 2 - 1)
-        if rank * 2 < n_workers:
-            ret.append(rank * 2)
-        return ret
-
     def worker_envs(self) -> Dict[str, Union[str, int]]:
         """
         get environment variables for workers
@@ -215,78 +310,127 @@ class RabitTracker:
         return {'DMLC_TRACKER_URI': self.hostIP,
                 'DMLC_TRACKER_PORT': self.port}
 
-    def get_tree(self, n_workers: int) -> Tuple[_TreeMap, Dict[int, int]]:
-        tree_map: _TreeMap = {}
-        parent_map: Dict[int, int] = {}
-        for r in range(n_workers):
-            tree_map[r] = self.get_neighbor(r, n_workers)
-            parent_map[r] = (r + 1) // 2 - 1
+    def get_tree(self, n_workers: int) -> Tuple[_TreeMap, _ParentMap]:
+        # Binary heap layout: the parent of r is (r - 1) // 2 (-1 for the root) and its
+        # children are 2r + 1 and 2r + 2.
+        parent_map = [(r - 1) // 2 for r in range(n_workers)]
+        tree_map = [[parent_map[r]] if r else [] for r in range(n_workers)]
+        for r in range(n_workers // 2):
+            tree_map[r].extend(range(2 * r + 1, min(2 * r + 3, n_workers)))
         return tree_map, parent_map
 
     def find_share_ring(
-        self, tree_map: _TreeMap, parent_map: Dict[int, int], r: int
+        self, tree_map: _TreeMap, parent_map: _ParentMap, r: int
     ) -> List[int]:
         """
         get a ring structure that tends to share nodes with the tree
         return a list starting from r
         """
-        nset = set(tree_map[r])
-        cset = nset - set([parent_map[r]])
-        if not cset:
-            return [r]
-        rlst = [r]
-        cnt = 0
-        for v in cset:
-            vlst = self.find_share_ring(tree_map, parent_map, v)
-            cnt += 1
-            if cnt == len(cset):
-                vlst.reverse()
-            rlst += vlst
+        rlst: List[int] = []
+        # Depth first walk with an explicit stack.  Each frame is (node, reverse), the
+        # subtree of the last child is laid out in reverse order.  A reversed subtree
+        # visits its children backwards and emits the node itself last, which is
+        # marked by a frame with reverse set to None.
+        stack: List[Tuple[int, Optional[bool]]] = [(r, False)]
+        while stack:
+            v, reverse = stack.pop()
+            if reverse is None:
+                rlst.append(v)
+                continue
+            cset = list(set(tree_map[v]) - {parent_map[v]})
+            frames: List[Tuple[int, Optional[bool]]] = [
+                (c, i == len(cset) - 1) for i, c in enumerate(cset)
+            ]
+            if reverse:
+                frames = [(c, not last) for c, last in reversed(frames)]
+                frames.append((v, None))
+            else:
+                rlst.append(v)
+            stack.extend(reversed(frames))
         return rlst
 
-    def get_ring(self, tree_map: _TreeMap, parent_map: Dict[int, int]) -> _RingMap:
-        """
-        get a ring connection used to recover local data
-        """
-        assert parent_map[0] == -1
-        rlst = self.find_share_ring(tree_map, parent_map, 0)
-        assert len(rlst) == len(tree_map)
-        ring_map: _RingMap = {}
-        n_workers = len(tree_map)
-        for r in range(n_workers):
-            rprev = (r + n_workers - 1) % n_workers
-            rnext = (r + 1) % n_workers
-            ring_map[rlst[r]] = (rlst[rprev], rlst[rnext])
-        return ring_map
-
-    def get_link_map(self, n_workers: int) -> Tuple[_TreeMap, Dict[int, int], _RingMap]:
+    def get_link_map(self, n_workers: int) -> Tuple[_TreeMap, _ParentMap, _RingMap]:
         """
         get the link map, this is a bit hacky, call for better algorithm
         to place similar nodes together
         """
         tree_map, parent_map = self.get_tree(n_workers)
-        ring_map = self.get_ring(tree_map, parent_map)
-        rmap = {0: 0}
-        k = 0
-        for i in range(n_workers - 1):
-            k = ring_map[k][1]
-            rmap[k] = i + 1
-
-        ring_map_: _RingMap = {}
-        tree_map_: _TreeMap = {}
-        parent_map_: Dict[int, int] = {}
-        for k, v in ring_map.items():
-            ring_map_[rmap[k]] = (rmap[v[0]], rmap[v[1]])
-        for k, tree_nodes in tree_map.items():
-            tree_map_[rmap[k]] = [rmap[x] for x in tree_nodes]
-        for k, parent in parent_map.items():
-            if k != 0:
-                parent_map_[rmap[k]] = rmap[parent]
-            else:
-                parent_map_[rmap[k]] = -1
+        # The ring used to recover local data tends to share links with the tree.
+        # Relabel the nodes by their position in that ring, order[i] is the node that
+        # gets the new rank i and rmap is its inverse.  The ring links of the new rank
+        # i are then i - 1 and i + 1.
+        order = self.find_share_ring(tree_map, parent_map, 0)
+        assert len(order) == n_workers
+        rmap = [0] * n_workers
+        for i, k in enumerate(order):
+            rmap[k] = i
+
+        tree_map_: _TreeMap = []
+        parent_map_: _ParentMap = []
+        ring_map_: _RingMap = []
+        for i, k in enumerate(order):
+            tree_map_.append([rmap[x] for x in tree_map[k]])
+            parent_map_.append(rmap[parent_map[k]] if k != 0 else -1)
+            ring_map_.append(((i - 1) % n_workers, (i + 1) % n_workers))
         return tree_map_, parent_map_, ring_map_
 
     def accept_workers(self, n_workers: int) -> None:
+        # asyncio.run and get_running_loop are not available on Python 3.6
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._serve(loop, n_workers))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+            self._done.set()
+
+    async def _serve(self, loop: asyncio.AbstractEventLoop, n_workers: int) -> None:
+        """
+        Accept the workers and serve them on a single event loop.  Handshakes of all
+        connected workers progress concurrently, while the workers themselves are
+        served one at a time in the order their handshakes complete: the rank
+        assignment decides which peers connect and which accept based on the workers
+        served before.
+        """
+        # workers that completed the handshake, or the error raised while accepting
+        # or doing it
+        ready: "asyncio.Queue[Union[WorkerEntry, Exception]]" = asyncio.Queue()
+        # keep a reference to the running handshakes
+        handshakes: Set["asyncio.Task[None]"] = set()
+
+        async def handshake(conn: socket.socket, s_addr: Tuple[str, int]) -> None:
+            s = WorkerEntry(ExSocket(conn, loop), s_addr)
+            try:
+                await s.handshake()
+            except ConnectionError as e:
+                # The peer left before identifying itself, e.g. a port probe.  Only
+                # errors from workers that did identify themselves stop the tracker.
+                _logger.warning('Drop connection from %s during handshake: %s', s.host, e)
+                conn.close()
+                return
+            except Exception as e:  # pylint: disable=broad-except
+                ready.put_nowait(e)
+                return
+            ready.put_nowait(s)
+
+        async def accept() -> None:
+            try:
+                while True:
+                    conn, s_addr = await loop.sock_accept(self.sock)
+                    # the protocol is made of small request/reply messages, don't let
+                    # Nagle's algorithm hold them back
+                    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    task = loop.create_task(handshake(conn, s_addr))
+                    handshakes.add(task)
+                    task.add_done_callback(handshakes.discard)
+            except asyncio.CancelledError:  # pylint: disable=try-except-raise
+                # an Exception subclass before Python 3.8
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                # e.g. running out of file descriptors, stop the tracker
+                ready.put_nowait(e)
+
         # set of nodes that finishes the job
         shutdown: Dict[int, WorkerEntry] = {}
         # set of nodes that is waiting for connections
@@ -300,63 +444,72 @@ class RabitTracker:
 
         start_time = time.time()
 
-        while len(shutdown) != n_workers:
-            fd, s_addr = self.sock.accept()
-            s = WorkerEntry(fd, s_addr)
-            if s.cmd == 'print':
-                msg = s.sock.recvstr()
-                # On dask we use print to avoid setting global verbosity.
-                if self._use_logger:
-                    logging.info(msg.strip())
+        self.sock.setblocking(False)
+        acceptor = loop.create_task(accept())
+        try:
+            while len(shutdown) != n_workers:
+                s = await ready.get()
+                if isinstance(s, Exception):
+                    raise s
+                if s.cmd == 'print':
+                    msg = await s.sock.recvstr()
+                    # On dask we use print to avoid setting global verbosity.
+                    if self._use_logger:
+                        _logger.info(msg.strip())
+                    else:
+                        print(msg.strip(), flush=True)
+                    continue
+                if s.cmd == 'shutdown':
+                    assert s.rank >= 0 and s.rank not in shutdown
+                    assert s.rank not in wait_conn
+                    shutdown[s.rank] = s
+                    _logger.debug('Received %s signal from %d', s.cmd, s.rank)
+                    continue
+                assert s.cmd in ("start", "recover")
+                # lazily initialize the workers
+                if tree_map is None:
+                    assert s.cmd == 'start'
+                    if s.world_size > 0:
+                        n_workers = s.world_size
+                    tree_map, parent_map, ring_map = self.get_link_map(n_workers)
+                    # set of nodes that is pending for getting up
+                    todo_nodes = list(range(n_workers))
                 else:
-                    print(msg.strip(), flush=True)
-                continue
-            if s.cmd == 'shutdown':
-                assert s.rank >= 0 and s.rank not in shutdown
-                assert s.rank not in wait_conn
-                shutdown[s.rank] = s
-                logging.debug('Received %s signal from %d', s.cmd, s.rank)
-                continue
-            assert s.cmd in ("start", "recover")
-            # lazily initialize the workers
-            if tree_map is None:
-                assert s.cmd == 'start'
-                if s.world_size > 0:
-                    n_workers = s.world_size
-                tree_map, parent_map, ring_map = self.get_link_map(n_workers)
-                # set of nodes that is pending for getting up
-                todo_nodes = list(range(n_workers))
-            else:
-                assert s.world_size in (-1, n_workers)
-            if s.cmd == 'recover':
-                assert s.rank >= 0
-
-            rank = s.decide_rank(job_map)
-            # batch assignment of ranks
-            if rank == -1:
-                assert todo_nodes
-                pending.append(s)
-                if len(pending) == len(todo_nodes):
-                    pending.sort(key=lambda x: x.host)
-                    for s in pending:
-                        rank = todo_nodes.pop(0)
-                        if s.jobid != 'NULL':
-                            job_map[s.jobid] = rank
-                        s.assign_rank(rank, wait_conn, tree_map, parent_map, ring_map)
-                        if s.wait_accept > 0:
-                            wait_conn[rank] = s
-                        logging.debug('Received %s signal from %s; assign rank %d',
-                                      s.cmd, s.host, s.rank)
-                if not todo_nodes:
-                    logging.info('@tracker All of %d nodes getting started', n_workers)
-            else:
-                s.assign_rank(rank, wait_conn, tree_map, parent_map, ring_map)
-                logging.debug('Received %s signal from %d', s.cmd, s.rank)
-                if s.wait_accept > 0:
-                    wait_conn[rank] = s
-        logging.info('@tracker All nodes finishes job')
+                    assert s.world_size in (-1, n_workers)
+                if s.cmd == 'recover':
+                    assert s.rank >= 0
+
+                rank = s.decide_rank(job_map)
+                # batch assignment of ranks
+                if rank == -1:
+                    assert todo_nodes
+                    pending.append(s)
+                    if len(pending) == len(todo_nodes):
+                        pending.sort(key=lambda x: _host_sort_key(x.host))
+                        ranks, todo_nodes = todo_nodes, []
+                        for s, rank in zip(pending, ranks):
+                            if s.jobid != 'NULL':
+                                job_map[s.jobid] = rank
+                            await s.assign_rank(rank, wait_conn, tree_map, parent_map, ring_map)
+                            if s.wait_accept > 0:
+                                wait_conn[rank] = s
+                            _logger.debug('Received %s signal from %s; assign rank %d',
+                                          s.cmd, s.host, s.rank)
+                    if not todo_nodes:
+                        _logger.info('@tracker All of %d nodes getting started', n_workers)
+                else:
+                    await s.assign_rank(rank, wait_conn, tree_map, parent_map, ring_map)
+                    _logger.debug('Received %s signal from %d', s.cmd, s.rank)
+                    if s.wait_accept > 0:
+                        wait_conn[rank] = s
+        finally:
+            acceptor.cancel()
+            for task in handshakes:
+                task.cancel()
+            await asyncio.gather(acceptor, *handshakes, return_exceptions=True)
+        _logger.info('@tracker All nodes finishes job')
         end_time = time.time()
-        logging.info(
+        _logger.info(
             '@tracker %s secs between node start and job finish',
             str(end_time - start_time)
         )
@@ -369,13 +522,23 @@ class RabitTracker:
         self.thread.start()
 
     def join(self) -> None:
+        # Also check the thread, so join can't outlive it should it exit without
+        # setting the event.
         while self.thread is not None and self.thread.is_alive():
-            self.thread.join(100)
+            if self._done.wait(1):
+                return
 
     def alive(self) -> bool:
-        return self.thread is not None and self.thread.is_alive()
+        return (
+            self.thread is not None
+            and self.thread.is_alive()
+            and not self._done.is_set()
+        )
 
 
+# The address of this host doesn't change during the lifetime of the process while
+# resolving it can take a DNS round trip.
+@functools.lru_cache(maxsize=4)
 def get_host_ip(hostIP: Optional[str] = None) -> str:
     if hostIP is None or hostIP == 'auto':
         hostIP = 'ip'
@@ -387,7 +550,7 @@ def get_host_ip(hostIP: Optional[str] = None) -> str:
         try:
             hostIP = socket.gethostbyname(socket.getfqdn())
         except gaierror:
-            logging.debug(
+            _logger.debug(
                 'gethostbyname(socket.getfqdn()) failed... trying on hostname()'
             )
             hostIP = socket.gethostbyname(socket.gethostname())
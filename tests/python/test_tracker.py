@@ -1,9 +1,14 @@
 from xgboost import RabitTracker
+from xgboost.tracker import _INT, kMagic
 import xgboost as xgb
 import pytest
 import testing as tm
 import numpy as np
+import errno
+import os
+import socket
 import sys
+import threading
 
 if sys.platform.startswith("win"):
     pytest.skip("Skipping dask tests on Windows", allow_module_level=True)
@@ -22,6 +27,249 @@ def test_rabit_tracker():
     xgb.rabit.finalize()
 
 
+@pytest.mark.parametrize(
+    "n_workers, ring, tree_map, parent_map, ring_map",
+    [
+        (1, [0], [[]], [-1], [(0, 0)]),
+        (2, [0, 1], [[1], [0]], [-1, 0], [(1, 1), (0, 0)]),
+        (3, [0, 1, 2], [[1, 2], [0], [0]], [-1, 0, 0], [(2, 1), (0, 2), (1, 0)]),
+        (
+            7,
+            [0, 1, 3, 4, 6, 5, 2],
+            [[1, 6], [0, 2, 3], [1], [1], [6], [6], [0, 5, 4]],
+            [-1, 0, 1, 1, 6, 6, 0],
+            [(6, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6), (5, 0)],
+        ),
+        (
+            10,
+            [0, 1, 3, 8, 7, 9, 4, 6, 5, 2],
+            [[1, 9], [0, 2, 6], [1, 4, 3], [2], [2], [6], [1, 5], [9], [9], [0, 8, 7]],
+            [-1, 0, 1, 2, 2, 6, 1, 9, 9, 0],
+            [(9, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6), (5, 7), (6, 8), (7, 9),
+             (8, 0)],
+        ),
+    ],
+)
+def test_rabit_tracker_link_map(n_workers, ring, tree_map, parent_map, ring_map):
+    tracker = RabitTracker(hostIP='127.0.0.1', n_workers=n_workers, port=9191)
+    tree, parent = tracker.get_tree(n_workers)
+    assert tracker.find_share_ring(tree, parent, 0) == ring
+    assert tracker.get_link_map(n_workers) == (tree_map, parent_map, ring_map)
+
+
+def test_rabit_tracker_large_link_map():
+    tracker = RabitTracker(hostIP='127.0.0.1', n_workers=1, port=9191)
+    n_workers = 4096
+    tree_map, parent_map, ring_map = tracker.get_link_map(n_workers)
+    assert parent_map[0] == -1
+    # ring is a single cycle over all workers
+    seen = [0]
+    for _ in range(n_workers - 1):
+        seen.append(ring_map[seen[-1]][1])
+    assert sorted(seen) == list(range(n_workers))
+    assert ring_map[seen[-1]][1] == 0
+    for r in range(n_workers):
+        assert ring_map[ring_map[r][1]][0] == r
+        if r != 0:
+            assert r in tree_map[parent_map[r]]
+            assert parent_map[r] in tree_map[r]
+
+
+def test_rabit_tracker_host_order():
+    from xgboost.tracker import _host_sort_key
+
+    hosts = ['worker-0', '::1', '10.0.0.10', 'fe80::2', '10.0.0.9', '1.2.3.4']
+    assert sorted(hosts, key=_host_sort_key) == [
+        '1.2.3.4', '10.0.0.9', '10.0.0.10', '::1', 'fe80::2', 'worker-0'
+    ]
+
+
+def _recvall(sock, nbytes):
+    buf = b''
+    while len(buf) < nbytes:
+        chunk = sock.recv(nbytes - len(buf))
+        assert chunk, "connection closed"
+        buf += chunk
+    return buf
+
+
+def _recvint(sock):
+    return _INT.unpack(_recvall(sock, _INT.size))[0]
+
+
+def _recvstr(sock):
+    return _recvall(sock, _recvint(sock)).decode()
+
+
+def _sendstr(sock, s):
+    sock.sendall(_INT.pack(len(s)) + s.encode())
+
+
+def _connect_tracker(port, rank, world_size, task_id, cmd):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(_INT.pack(kMagic))
+    assert _recvint(sock) == kMagic
+    sock.sendall(_INT.pack(rank) + _INT.pack(world_size))
+    _sendstr(sock, task_id)
+    _sendstr(sock, cmd)
+    return sock
+
+
+def _fake_worker(port, task_id, world_size, results):
+    """Pure Python worker following AllreduceBase::ReConnectLinks in rabit."""
+    tracker = _connect_tracker(port, -1, world_size, task_id, 'start')
+    rank, _, world = _recvint(tracker), _recvint(tracker), _recvint(tracker)
+    neighbors = [_recvint(tracker) for _ in range(_recvint(tracker))]
+    prev_rank, next_rank = _recvint(tracker), _recvint(tracker)
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    # no good link yet
+    tracker.sendall(_INT.pack(0))
+    num_conn, num_accept = _recvint(tracker), _recvint(tracker)
+    links = {}
+    for _ in range(num_conn):
+        host, hport, hrank = _recvstr(tracker), _recvint(tracker), _recvint(tracker)
+        peer = socket.create_connection((host, hport))
+        peer.sendall(_INT.pack(rank))
+        assert _recvint(peer) == hrank
+        links[hrank] = peer
+    # no error, then the listening port
+    tracker.sendall(_INT.pack(0) + _INT.pack(listener.getsockname()[1]))
+    tracker.close()
+    for _ in range(num_accept):
+        peer, _ = listener.accept()
+        peer.sendall(_INT.pack(rank))
+        links[_recvint(peer)] = peer
+    listener.close()
+    for peer in links.values():
+        peer.close()
+
+    expected = set(neighbors) | {r for r in (prev_rank, next_rank) if r != -1}
+    results[task_id] = (rank, world, set(links), expected)
+
+    printer = _connect_tracker(port, rank, world_size, task_id, 'print')
+    _sendstr(printer, f'worker {rank} is done')
+    printer.close()
+    _connect_tracker(port, rank, world_size, task_id, 'shutdown').close()
+
+
+def run_fake_workers(tracker, n_workers):
+    results = {}
+    threads = [
+        threading.Thread(
+            target=_fake_worker, args=(tracker.port, f'task-{i}', n_workers, results)
+        )
+        for i in range(n_workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(60)
+    assert len(results) == n_workers
+    tracker.join()
+    assert not tracker.alive()
+    return results
+
+
+@pytest.mark.parametrize("n_workers", [1, 2, 7])
+def test_rabit_tracker_fake_workers(n_workers):
+    tracker = RabitTracker(hostIP='127.0.0.1', n_workers=n_workers, port=9191)
+    tracker.start(n_workers)
+    results = run_fake_workers(tracker, n_workers)
+    assert sorted(rank for rank, _, _, _ in results.values()) == list(range(n_workers))
+    for rank, world, links, expected in results.values():
+        assert world == n_workers
+        # every link was set up by exactly one connect and one accept
+        assert links == expected
+
+
+def test_rabit_tracker_drop_probe():
+    n_workers = 3
+    tracker = RabitTracker(hostIP='127.0.0.1', n_workers=n_workers, port=9191)
+    tracker.start(n_workers)
+    # connections closed before identifying themselves don't stop the tracker
+    socket.create_connection(('127.0.0.1', tracker.port)).close()
+    probe = socket.create_connection(('127.0.0.1', tracker.port))
+    probe.sendall(_INT.pack(kMagic)[:2])
+    probe.close()
+    results = run_fake_workers(tracker, n_workers)
+    assert sorted(rank for rank, _, _, _ in results.values()) == list(range(n_workers))
+
+
+def test_rabit_tracker_invalid_magic():
+    tracker = RabitTracker(hostIP='127.0.0.1', n_workers=2, port=9191)
+    tracker.start(2)
+    sock = socket.create_connection(('127.0.0.1', tracker.port))
+    sock.sendall(_INT.pack(kMagic + 1))
+    tracker.join()
+    assert not tracker.alive()
+    sock.close()
+
+
+class _AcceptFails(socket.socket):
+    def accept(self):
+        raise OSError(errno.EMFILE, os.strerror(errno.EMFILE))
+
+
+def test_rabit_tracker_accept_error():
+    tracker = RabitTracker(hostIP='127.0.0.1', n_workers=2, port=9191)
+    failing = _AcceptFails(socket.AF_INET, socket.SOCK_STREAM)
+    failing.bind(('127.0.0.1', 0))
+    failing.listen(1)
+    tracker.sock.close()
+    tracker.sock = failing
+    tracker.start(2)
+    tracker.join()
+    assert not tracker.alive()
+
+
+def test_rabit_tracker_buffered_reads():
+    import asyncio
+    from xgboost.tracker import ExSocket, WorkerEntry
+
+    def pack_str(s):
+        return _INT.pack(len(s)) + s.encode()
+
+    loop = asyncio.new_event_loop()
+    tracker_end, worker_end = socket.socketpair()
+    try:
+        sock = ExSocket(tracker_end, loop)
+
+        # messages split across several receives
+        data = _INT.pack(1234) + pack_str('split')
+        for i in range(len(data)):
+            loop.call_later(0.001 * i, worker_end.sendall, data[i:i + 1])
+        assert loop.run_until_complete(sock.recvint()) == 1234
+        assert loop.run_until_complete(sock.recvstr()) == 'split'
+
+        # several messages in a single receive
+        worker_end.sendall(_INT.pack(1) + _INT.pack(-2) + pack_str('combined'))
+        assert loop.run_until_complete(sock.recvint()) == 1
+        assert loop.run_until_complete(sock.recvint()) == -2
+        assert loop.run_until_complete(sock.recvstr()) == 'combined'
+
+        # the print message read ahead with the handshake is kept for recvstr
+        worker_end.sendall(
+            _INT.pack(kMagic) + _INT.pack(0) + _INT.pack(2) + pack_str('task-0')
+            + pack_str('print') + pack_str('hello')
+        )
+        entry = WorkerEntry(sock, ('127.0.0.1', 0))
+        loop.run_until_complete(entry.handshake())
+        assert _recvint(worker_end) == kMagic
+        assert (entry.rank, entry.world_size) == (0, 2)
+        assert (entry.jobid, entry.cmd) == ('task-0', 'print')
+        assert loop.run_until_complete(entry.sock.recvstr()) == 'hello'
+
+        worker_end.close()
+        with pytest.raises(ConnectionError):
+            loop.run_until_complete(sock.recvint())
+    finally:
+        tracker_end.close()
+        worker_end.close()
+        loop.close()
+
+
 def run_rabit_ops(client, n_workers):
     from test_with_dask import _get_client_workers
     from xgboost.dask import RabitContext, _get_rabit_args